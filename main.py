@@ -1,12 +1,20 @@
+import asyncio
+from collections import OrderedDict
 from collections.abc import AsyncIterator
 from dataclasses import dataclass
+import functools
+import hashlib
+import inspect
 import logging
+import re
+import string
+import time
 import aiomysql
 from mcp.server.fastmcp import FastMCP, Context
 from dotenv import load_dotenv
 import os
 from contextlib import asynccontextmanager
-from typing import Union
+from typing import Optional, Union
 
 
 # Load environment variables defined in your docker-compose.yaml
@@ -26,6 +34,111 @@ DATABASE_USER = os.getenv("MYSQL_DATABASE_USER")
 DATABASE_PASSWORD = os.getenv("MYSQL_DATABASE_PASSWORD")
 DATABASE_NAME = os.getenv("MYSQL_DATABASE_NAME")
 
+# Connection pool configuration (min == max preallocates every connection)
+def _pool_sizes_from_env() -> tuple[int, int]:
+    """
+    Resolve (minsize, maxsize) for the pool.
+
+    The min defaults to the resolved max, and a min above the max is clamped,
+    since aiomysql refuses to create a pool with maxsize < minsize.
+    """
+    max_size = int(os.getenv("MYSQL_POOL_MAX", str((os.cpu_count() or 1) * 2)))
+    min_size = int(os.getenv("MYSQL_POOL_MIN", str(max_size)))
+    if min_size > max_size:
+        logger.warning(
+            "MYSQL_POOL_MIN=%s is above MYSQL_POOL_MAX=%s, using %s", min_size, max_size, max_size
+        )
+        min_size = max_size
+    return min_size, max_size
+
+POOL_MIN_SIZE, POOL_MAX_SIZE = _pool_sizes_from_env()
+POOL_RECYCLE = int(os.getenv("MYSQL_POOL_RECYCLE", "3600"))
+CONNECT_TIMEOUT = int(os.getenv("MYSQL_CONNECT_TIMEOUT", "10"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("MYSQL_HEALTH_CHECK_TIMEOUT", "2"))
+
+# Result cache for SELECT and metadata tools (MYSQL_CACHE_TTL=0 disables it)
+CACHE_TTL = float(os.getenv("MYSQL_CACHE_TTL", "60"))
+CACHE_MAX_SIZE = int(os.getenv("MYSQL_CACHE_SIZE", "512"))
+# Results with more rows than this are not cached, so the cache memory stays bounded
+CACHE_MAX_ROWS = int(os.getenv("MYSQL_CACHE_MAX_ROWS", "1000"))
+# Table schemas rarely change, so they are kept much longer than other results
+SCHEMA_CACHE_TTL = float(os.getenv("MYSQL_SCHEMA_CACHE_TTL", "3600"))
+SCHEMA_CACHE_MAX_SIZE = 1024
+
+# Hard cap on rows returned by get_table_data
+MAX_ROWS = 10_000
+DEFAULT_BATCH_SIZE = 500
+# Maximum number of queries a single batch call may run
+MAX_BATCH_QUERIES = 10
+
+# Matches queries whose first keyword is SELECT, without copying the query
+_SELECT_RE = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+# Characters allowed after the last statement of a query
+_STATEMENT_END = string.whitespace + ";"
+# Unquoted MySQL identifiers (ASCII subset), which may not consist only of digits
+_IDENT_RE = re.compile(r"(?!\d+\Z)[0-9A-Za-z_$]{1,64}")
+
+# Parameterized metadata queries, so the statement text is identical for every table
+_TABLE_SCHEMA_SQL = (
+    "SELECT COLUMN_NAME, COLUMN_TYPE "
+    "FROM information_schema.COLUMNS "
+    "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s "
+    "ORDER BY ORDINAL_POSITION"
+)
+_DATABASE_SCHEMA_SQL = (
+    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE "
+    "FROM information_schema.COLUMNS "
+    "WHERE TABLE_SCHEMA = %s "
+    "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+)
+_TABLE_INDEXES_SQL = (
+    "SELECT INDEX_NAME, COLUMN_NAME "
+    "FROM information_schema.STATISTICS "
+    "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s "
+    # PRIMARY first like SHOW INDEX, then the other indexes by name
+    "ORDER BY INDEX_NAME = 'PRIMARY' DESC, INDEX_NAME, SEQ_IN_INDEX"
+)
+_TABLE_EXISTS_SQL = (
+    "SELECT 1 FROM information_schema.TABLES "
+    "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s"
+)
+
+def _is_single_select(query: str) -> bool:
+    """
+    Check that ``query`` is one SELECT statement.
+
+    aiomysql always enables multi-statements, so anything after a ``;`` other
+    than whitespace or more semicolons would run as a second statement.
+    """
+    if not _SELECT_RE.match(query):
+        return False
+    end = query.find(";")
+    return end == -1 or not query[end:].strip(_STATEMENT_END)
+
+# MySQL identifiers are at most 64 characters long
+_MAX_IDENT_LENGTH = 64
+
+@functools.lru_cache(maxsize=1024)
+def _matches_identifier(name: str) -> bool:
+    return _IDENT_RE.fullmatch(name) is not None
+
+def _is_valid_identifier(name: str) -> bool:
+    """
+    Check a table name against ``_IDENT_RE``, memoized for repeated tool calls.
+
+    Names longer than an identifier are rejected before the memoized call,
+    so the cache only ever holds short strings.
+    """
+    return len(name) <= _MAX_IDENT_LENGTH and _matches_identifier(name)
+
+def _project_tables(rows) -> list[dict]:
+    """Map ``SHOW TABLES`` rows to ``{"tablename": ...}`` dicts."""
+    return [{"tablename": row[0]} for row in rows]
+
+def _project_columns(rows) -> list[dict]:
+    """Map ``(COLUMN_NAME, COLUMN_TYPE)`` rows to column dicts."""
+    return [{"column_name": row[0], "data_type": row[1]} for row in rows]
+
 # Application context
 @dataclass
 class AppContext:
@@ -33,12 +146,98 @@ class AppContext:
 
 # Database pool
 db_pool = None
+_pool_lock = asyncio.Lock()
+
+class TTLCache:
+    """LRU cache whose entries expire ``ttl`` seconds after being stored."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+query_cache = TTLCache(maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL)
+# Table schemas keyed by (database, table); also dropped by invalidate_schema_cache
+_schema_cache = TTLCache(maxsize=SCHEMA_CACHE_MAX_SIZE, ttl=SCHEMA_CACHE_TTL)
+_CACHE_MISS = object()
+
+def _is_cacheable(result) -> bool:
+    """Errors and results larger than ``CACHE_MAX_ROWS`` rows are not cached."""
+    if isinstance(result, dict) and "error" in result:
+        return False
+    rows = result.get("rows") if isinstance(result, dict) else result
+    return not (isinstance(rows, list) and len(rows) > CACHE_MAX_ROWS)
+
+def cached_tool(fn):
+    """
+    Serve repeated calls of a SELECT or metadata tool from ``query_cache``.
+
+    The cache key is a hash of the tool name and its arguments (the MCP
+    context is excluded), so identical calls within the TTL skip MySQL.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if query_cache.ttl <= 0:
+            return await fn(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        tool_args = {name: value for name, value in bound.arguments.items() if name != "ctx"}
+        key = hashlib.blake2b(f"{fn.__name__}:{tool_args}".encode(), digest_size=16).digest()
+        result = query_cache.get(key, _CACHE_MISS)
+        if result is _CACHE_MISS:
+            result = await fn(*args, **kwargs)
+            if _is_cacheable(result):
+                query_cache.set(key, result)
+        return result
+
+    return wrapper
 
 async def get_db_pool() -> aiomysql.Pool:
     global db_pool
-    if db_pool is None:
+    # Fast path: the pool is already created, no need to take the lock
+    if db_pool is not None:
+        return db_pool
+    async with _pool_lock:
+        # Another coroutine may have created the pool while we waited
+        if db_pool is not None:
+            return db_pool
         try:
-            logger.info(f"Connecting to MySQL database at {DATABASE_HOST}:{DATABASE_PORT}")
+            logger.info("Connecting to MySQL database at %s:%s", DATABASE_HOST, DATABASE_PORT)
+            logger.info(
+                "Pool settings: minsize=%s, maxsize=%s, pool_recycle=%s, connect_timeout=%s",
+                POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_RECYCLE, CONNECT_TIMEOUT,
+            )
             db_pool = await aiomysql.create_pool(
                 host=DATABASE_HOST,
                 port=DATABASE_PORT,
@@ -46,10 +245,14 @@ async def get_db_pool() -> aiomysql.Pool:
                 password=DATABASE_PASSWORD,
                 db=DATABASE_NAME,
                 autocommit=False,
+                minsize=POOL_MIN_SIZE,
+                maxsize=POOL_MAX_SIZE,
+                pool_recycle=POOL_RECYCLE,
+                connect_timeout=CONNECT_TIMEOUT,
             )
             logger.info("Database connection established successfully")
         except Exception as e:
-            logger.error(f"Error connecting to database: {e}")
+            logger.error("Error connecting to database: %s", e)
             raise
     return db_pool
 
@@ -75,6 +278,12 @@ mcp = FastMCP(
     port=3002, 
 )
 
+async def _do_health(db: aiomysql.Pool) -> tuple:
+    async with db.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT 1")
+            return await cur.fetchone()
+
 @mcp.tool()
 async def health_check(ctx: Context) -> dict:
     """
@@ -85,16 +294,18 @@ async def health_check(ctx: Context) -> dict:
     """
     db = ctx.request_context.lifespan_context.db
     try:
-        async with db.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT 1")
-                test = await cur.fetchone()
+        # Bounds both pool acquisition and the query, so a hung server cannot hold a slot
+        test = await asyncio.wait_for(_do_health(db), timeout=HEALTH_CHECK_TIMEOUT)
         return {"status": "healthy", "database": "connected", "result": test[0]}
+    except asyncio.TimeoutError:
+        logger.error("Health check timed out after %ss", HEALTH_CHECK_TIMEOUT)
+        return {"status": "error", "error": "timeout"}
     except Exception as e:
-        logger.error(f"Health check error: {e}")
+        logger.error("Health check error: %s", e)
         return {"status": "error", "error": "Service unavailable"}
 
 @mcp.tool()
+@cached_tool
 async def list_tables(ctx: Context) -> list[dict]:
     """
     List all tables in the database.
@@ -107,10 +318,10 @@ async def list_tables(ctx: Context) -> list[dict]:
         async with conn.cursor() as cur:
             await cur.execute("SHOW TABLES")
             result = await cur.fetchall()
-    return [{"tablename": row[0]} for row in result]
+    return _project_tables(result)
 
 @mcp.tool()
-async def get_table_schema(ctx: Context, table_name: str) -> list[dict]:
+async def get_table_schema(ctx: Context, table_name: str) -> Union[dict, list[dict]]:
     """
     Get the schema of a table.
 
@@ -120,12 +331,172 @@ async def get_table_schema(ctx: Context, table_name: str) -> list[dict]:
     Returns:
         A list of dictionaries with the column names and data types.
     """
+    if not _is_valid_identifier(table_name):
+        return {"error": "Invalid table name"}
+    key = (DATABASE_NAME, table_name)
+    columns = _schema_cache.get(key)
+    if columns is not None:
+        return columns
     db = ctx.request_context.lifespan_context.db
     async with db.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(f"DESCRIBE {table_name}")
+        async with conn.cursor() as cur:
+            await cur.execute(_TABLE_SCHEMA_SQL, key)
             result = await cur.fetchall()
-            return [{"column_name": row["Field"], "data_type": row["Type"]} for row in result]
+    # Every table has at least one column, so no rows means no such table.
+    # Not cached, so the table is found once it is created.
+    if not result:
+        return {"error": "Table not found"}
+    columns = _project_columns(result)
+    _schema_cache.set(key, columns)
+    return columns
+
+@mcp.tool()
+@cached_tool
+async def describe_database(ctx: Context) -> dict[str, list[dict]]:
+    """
+    Get every table of the database with its columns, in a single query.
+
+    Returns:
+        A dictionary mapping each table name to its column names and data types.
+    """
+    db = ctx.request_context.lifespan_context.db
+    async with db.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(_DATABASE_SCHEMA_SQL, (DATABASE_NAME,))
+            result = await cur.fetchall()
+    tables = {}
+    for table_name, column_name, data_type in result:
+        tables.setdefault(table_name, []).append({"column_name": column_name, "data_type": data_type})
+    return tables
+
+@mcp.tool()
+async def invalidate_schema_cache(ctx: Context, table_name: Optional[str] = None) -> dict:
+    """
+    Drop cached table schemas, e.g. after running DDL statements.
+
+    The result cache of the other cached tools is cleared as well, since
+    their results may depend on the old schema.
+
+    Args:
+        table_name: The table whose schema should be dropped. All tables when omitted.
+
+    Returns:
+        A dictionary with the number of schemas removed from the cache.
+    """
+    if table_name is None:
+        invalidated = len(_schema_cache)
+        _schema_cache.clear()
+    else:
+        invalidated = int(_schema_cache.pop((DATABASE_NAME, table_name), None) is not None)
+    query_cache.clear()
+    return {"invalidated": invalidated}
+
+async def _fetch_rows(
+    db: aiomysql.Pool, query: str, limit: int = MAX_ROWS, batch_size: int = DEFAULT_BATCH_SIZE
+) -> tuple[list[dict], bool]:
+    """
+    Stream up to ``limit`` rows of ``query`` from a server-side cursor.
+
+    Returns the rows and whether the query had more rows than ``limit``.
+    """
+    limit = max(0, min(limit, MAX_ROWS))
+    batch_size = max(1, batch_size)
+    rows = []
+    truncated = False
+    async with db.acquire() as conn:
+        cur = await conn.cursor(aiomysql.SSDictCursor)
+        drained = False
+        try:
+            logger.debug("Executing query: %s", query)
+            await cur.execute(query)
+            while len(rows) < limit:
+                batch = await cur.fetchmany(min(batch_size, limit - len(rows)))
+                if not batch:
+                    drained = True
+                    break
+                rows.extend(batch)
+            else:
+                truncated = await cur.fetchone() is not None
+                drained = not truncated
+        finally:
+            if drained:
+                await cur.close()
+            else:
+                # SSCursor.close() would read and discard every remaining row, so the
+                # connection is dropped instead; the pool does not reuse closed connections
+                conn.close()
+    return rows, truncated
+
+def _rows_result(rows: list[dict], truncated: bool) -> Union[dict, list[dict]]:
+    """Return ``rows`` as is, or wrapped with a notice when the result was cut off."""
+    if not truncated:
+        return rows
+    return {
+        "rows": rows,
+        "truncated": True,
+        "message": f"Result truncated to the first {len(rows)} rows",
+    }
+
+@mcp.tool()
+@cached_tool
+async def get_table_data(
+    ctx: Context, query: str, limit: int = MAX_ROWS, batch_size: int = DEFAULT_BATCH_SIZE
+) -> Union[dict, list[dict]]:
+    """
+    Get data from the database with a single SELECT statement.
+
+    Rows are streamed from a server-side cursor in batches, so large result
+    sets are never fully buffered in memory.
+
+    Args:
+        query: The SELECT query to execute.
+        limit: Maximum number of rows to return (capped at 10000).
+        batch_size: Number of rows fetched from the server per round-trip.
+
+    Returns:
+        A list of dictionaries with the query results. When the query has more
+        rows than ``limit``, a dictionary with the returned ``rows`` and
+        ``truncated: true`` instead.
+    """
+    if not _is_single_select(query):
+        return {"error": "You can only perform SELECT queries"}
+    db = ctx.request_context.lifespan_context.db
+    rows, truncated = await _fetch_rows(db, query, limit, batch_size)
+    return _rows_result(rows, truncated)
+
+@mcp.tool()
+async def batch(ctx: Context, queries: list[str]) -> Union[dict, list[Union[dict, list[dict]]]]:
+    """
+    Run several SELECT queries concurrently, each on its own pooled connection.
+
+    Args:
+        queries: The SELECT queries to execute (at most 10).
+
+    Returns:
+        A list with the result of each query, in the same order as the queries,
+        in the same format as get_table_data. A query that fails yields an
+        ``{"error": ...}`` entry.
+    """
+    if len(queries) > MAX_BATCH_QUERIES:
+        return {"error": f"A batch can run at most {MAX_BATCH_QUERIES} queries"}
+    for index, query in enumerate(queries):
+        if not _is_single_select(query):
+            return {"error": f"You can only perform SELECT queries (query {index})"}
+    db = ctx.request_context.lifespan_context.db
+    results = await asyncio.gather(
+        *(_fetch_rows(db, query) for query in queries), return_exceptions=True
+    )
+    output = []
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            # One failing query must not discard the results of the others
+            logger.error("Batch query %s failed: %s", index, result)
+            output.append({"error": str(result)})
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            output.append(_rows_result(*result))
+    return output
 
 @mcp.tool()
 async def execute_query(ctx: Context, query: str) -> Union[dict, list[dict]]:
@@ -139,15 +510,21 @@ async def execute_query(ctx: Context, query: str) -> Union[dict, list[dict]]:
         A dictionary or list of dictionaries with the query results.
     """
     db = ctx.request_context.lifespan_context.db
-    async with db.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            logger.info(f"Executing query: {query}")
-            await cur.execute(query)
-            result = await cur.fetchall()
-            return result
+    try:
+        async with db.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                logger.debug("Executing query: %s", query)
+                await cur.execute(query)
+                result = await cur.fetchall()
+                return result
+    finally:
+        # The query may have written data or changed tables, so cached reads are stale
+        query_cache.clear()
+        _schema_cache.clear()
 
 @mcp.tool()
-async def show_indexes_table(ctx: Context, table_name: str) -> list[dict]:
+@cached_tool
+async def show_indexes_table(ctx: Context, table_name: str) -> Union[dict, list[dict]]:
     """
     Show the indexes of a table.
 
@@ -157,32 +534,26 @@ async def show_indexes_table(ctx: Context, table_name: str) -> list[dict]:
     Returns:
         A list of dictionaries with the index names and column names.
     """
+    if not _is_valid_identifier(table_name):
+        return {"error": "Invalid table name"}
     db = ctx.request_context.lifespan_context.db
     async with db.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(f"SHOW INDEX FROM {table_name}")
+        async with conn.cursor() as cur:
+            await cur.execute(_TABLE_INDEXES_SQL, (DATABASE_NAME, table_name))
             result = await cur.fetchall()
+            if not result:
+                # A table may have no indexes, so check that it exists
+                await cur.execute(_TABLE_EXISTS_SQL, (DATABASE_NAME, table_name))
+                if await cur.fetchone() is None:
+                    return {"error": "Table not found"}
+            # Rows are (INDEX_NAME, COLUMN_NAME), ordered by index then column position
             indexes_map = {}
-            for row in result:
-                index_name = row["Key_name"]
-                column_name = row["Column_name"]
-                # Seq_in_index is 1-based index of column in index
-                seq_in_index = row["Seq_in_index"]
-
-                if index_name not in indexes_map:
-                    indexes_map[index_name] = []
-                indexes_map[index_name].append((seq_in_index, column_name))
-            
-            output_list = []
-            for index_name, cols_with_seq in indexes_map.items():
-                # Sort columns by sequence number (the first element of the tuple)
-                cols_with_seq.sort(key=lambda x: x[0])
-                # Extract just the column names in the correct order
-                sorted_columns = [col_name for seq, col_name in cols_with_seq]
-                output_list.append({"index_name": index_name, "columns": sorted_columns})
-            return output_list
+            for index_name, column_name in result:
+                indexes_map.setdefault(index_name, []).append(column_name)
+            return [{"index_name": name, "columns": columns} for name, columns in indexes_map.items()]
 
 @mcp.tool()
+@cached_tool
 async def show_explain_query(ctx: Context, query: str) -> Union[dict, list[dict]]:
     """
     Show the explain of a query.
@@ -193,15 +564,25 @@ async def show_explain_query(ctx: Context, query: str) -> Union[dict, list[dict]
     Returns:
         A dictionary or list of dictionaries with the explain results.
     """
+    if not _is_single_select(query):
+        return {"error": "You can only perform SELECT queries. Start with SELECT."}
     db = ctx.request_context.lifespan_context.db
     async with db.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
+        async with conn.cursor() as cur:
             await cur.execute(f"EXPLAIN {query}")
             result = await cur.fetchall()
-            return [dict(row) for row in result]
+            columns = [column[0] for column in cur.description]
+            return [dict(zip(columns, row)) for row in result]
 
 if __name__ == "__main__":
     logger.info("Starting MCP server...")
-    mcp.run(
-        transport='sse'
-    )
+    try:
+        import uvloop
+    except ImportError:
+        mcp.run(
+            transport='sse'
+        )
+    else:
+        # Same as mcp.run(transport='sse'), on the libuv-based event loop
+        logger.info("Using uvloop event loop")
+        uvloop.run(mcp.run_sse_async())
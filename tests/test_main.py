@@ -1,4 +1,5 @@
 # tests/test_main.py
+import asyncio
 import sys
 import os
 
@@ -14,27 +15,55 @@ from unittest.mock import AsyncMock, MagicMock
 # and pytest is run from there. This import might need adjustment based on your project structure.
 import main as main_module
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    # Cached tool results must not leak between tests
+    main_module.query_cache.clear()
+    main_module._schema_cache.clear()
+    yield
+    main_module.query_cache.clear()
+    main_module._schema_cache.clear()
+
+class CursorContext:
+    """Stand-in for the object aiomysql's conn.cursor() returns."""
+
+    def __init__(self, cur):
+        self.cur = cur
+
+    def __await__(self):
+        async def cursor():
+            return self.cur
+        return cursor().__await__()
+
+    async def __aenter__(self):
+        return self.cur
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.cur.close()
+
+@pytest.fixture(scope="module")
 def mock_db_objects():
+    # Built once per module: AsyncMock creation is expensive, so the mock tree
+    # is shared and reset_mock_db_objects restores it before each test.
     # 1. Cursor object (mock_cur)
     mock_cur = AsyncMock()
     mock_cur.fetchone = AsyncMock() # Individual methods need to be AsyncMock if awaited
     mock_cur.fetchall = AsyncMock()
+    mock_cur.fetchmany = AsyncMock(return_value=[])
     mock_cur.execute = AsyncMock()
+    mock_cur.close = AsyncMock()
 
-    # 2. Async Context Manager for cursor (cursor_acm)
-    # This is what `conn.cursor()` returns.
-    cursor_acm = AsyncMock() # This object itself is the async context manager
-    # When `async with cursor_acm as cur_obj:`, cur_obj will be the result of awaiting __aenter__
-    cursor_acm.__aenter__.return_value = mock_cur
-    # __aexit__ can be an AsyncMock too if its result/await status matters
-    cursor_acm.__aexit__ = AsyncMock(return_value=None) 
+    # 2. Cursor context (cursor_acm)
+    # This is what `conn.cursor()` returns. Like aiomysql's context manager, it can be
+    # used with `async with` or awaited directly to get the cursor.
+    cursor_acm = CursorContext(mock_cur)
 
     # 3. Connection object (mock_conn)
     mock_conn = AsyncMock()
     # conn.cursor() is a synchronous method in aiomysql that returns an async context manager.
     # So, mock_conn.cursor should be a MagicMock whose return_value is our cursor_acm.
     mock_conn.cursor = MagicMock(return_value=cursor_acm)
+    mock_conn.close = MagicMock() # close() is synchronous in aiomysql
 
     # 4. Async Context Manager for connection (acquire_acm)
     # This is what `db_pool.acquire()` returns.
@@ -49,7 +78,19 @@ def mock_db_objects():
     
     return mock_db_pool, mock_conn, mock_cur
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def reset_mock_db_objects(mock_db_objects):
+    mock_db_pool, mock_conn, mock_cur = mock_db_objects
+    for method in (mock_cur.fetchone, mock_cur.fetchall, mock_cur.fetchmany, mock_cur.execute, mock_cur.close):
+        method.reset_mock(return_value=True, side_effect=True)
+    mock_cur.fetchone.return_value = None
+    mock_cur.fetchmany.return_value = []
+    mock_cur.description = None
+    mock_conn.cursor.reset_mock()
+    mock_conn.close.reset_mock()
+    mock_db_pool.acquire.reset_mock()
+
+@pytest.fixture(scope="module")
 def mock_ctx(mock_db_objects):
     mock_db, _, _ = mock_db_objects
     ctx = MagicMock() # Using generic MagicMock for simplicity
@@ -80,6 +121,20 @@ async def test_health_check_fail_db_error(mock_ctx, mock_db_objects):
     # Optionally, you can also check if logger.error was called if you mock the logger
     # For now, we'll assume the internal logging is correct based on the function's code.
 
+@pytest.mark.asyncio
+async def test_health_check_timeout(mock_ctx, mock_db_objects, mocker):
+    _, _, mock_cur = mock_db_objects
+    mocker.patch.object(main_module, 'HEALTH_CHECK_TIMEOUT', 0.01)
+
+    async def hung_execute(query):
+        await asyncio.sleep(1)
+
+    mock_cur.execute.side_effect = hung_execute # Simulate a MySQL server that never answers
+
+    result = await main_module.health_check(mock_ctx)
+
+    assert result == {"status": "error", "error": "timeout"}
+
 # Tests for list_tables
 @pytest.mark.asyncio
 async def test_list_tables_success(mock_ctx, mock_db_objects):
@@ -100,36 +155,221 @@ async def test_list_tables_empty(mock_ctx, mock_db_objects):
     
     assert result == []
 
+@pytest.mark.asyncio
+async def test_list_tables_cached(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = [('table1',)]
+
+    first = await main_module.list_tables(mock_ctx)
+    second = await main_module.list_tables(mock_ctx)
+
+    # The second call is served from the cache without hitting MySQL
+    mock_cur.execute.assert_called_once_with("SHOW TABLES")
+    assert first == second == [{"tablename": "table1"}]
+
+@pytest.mark.asyncio
+async def test_list_tables_cache_disabled(mock_ctx, mock_db_objects, mocker):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = [('table1',)]
+    mocker.patch.object(main_module.query_cache, 'ttl', 0)
+
+    await main_module.list_tables(mock_ctx)
+    await main_module.list_tables(mock_ctx)
+
+    assert mock_cur.execute.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_table_data_large_result_not_cached(mock_ctx, mock_db_objects, mocker):
+    _, _, mock_cur = mock_db_objects
+    mocker.patch.object(main_module, 'CACHE_MAX_ROWS', 1)
+    mock_cur.fetchmany.side_effect = [[{"id": 1}, {"id": 2}], [], [{"id": 1}, {"id": 2}], []]
+
+    await main_module.get_table_data(mock_ctx, "SELECT id FROM t")
+    await main_module.get_table_data(mock_ctx, "SELECT id FROM t")
+
+    assert mock_cur.execute.call_count == 2
+
+@pytest.mark.asyncio
+async def test_execute_query_clears_cached_reads(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    query = "SELECT count(*) AS total FROM coupons"
+    mock_cur.fetchmany.side_effect = [[{"total": 1}], [], [{"total": 2}], []]
+
+    assert await main_module.get_table_data(mock_ctx, query) == [{"total": 1}]
+    await main_module.execute_query(mock_ctx, "INSERT INTO coupons (id) VALUES (2)")
+    result = await main_module.get_table_data(mock_ctx, query)
+
+    # The SELECT after the write reaches MySQL again instead of the cache
+    assert result == [{"total": 2}]
+    assert [call.args[0] for call in mock_cur.execute.call_args_list] == [
+        query, "INSERT INTO coupons (id) VALUES (2)", query
+    ]
+
 # Tests for get_table_schema
 @pytest.mark.asyncio
-async def test_get_table_schema_success(mock_ctx, mock_db_objects):
+async def test_get_table_schema_success(mock_ctx, mock_db_objects, mocker):
     _, _, mock_cur = mock_db_objects
-    # Simulate output from aiomysql.DictCursor for DESCRIBE
+    mocker.patch.object(main_module, 'DATABASE_NAME', 'testdb_mock')
+    # Simulate (COLUMN_NAME, COLUMN_TYPE) rows from the information_schema.COLUMNS query
     mock_cur.fetchall.return_value = [
-        {"Field": "id", "Type": "int(11)", "Null": "NO", "Key": "PRI", "Default": None, "Extra": "auto_increment"},
-        {"Field": "name", "Type": "varchar(255)", "Null": "YES", "Key": "", "Default": None, "Extra": ""}
+        ("id", "int(11)"),
+        ("name", "varchar(255)")
     ]
     table_name = "my_table"
     
     result = await main_module.get_table_schema(mock_ctx, table_name)
     
-    mock_cur.execute.assert_called_once_with(f"DESCRIBE {table_name}")
+    mock_cur.execute.assert_called_once_with(main_module._TABLE_SCHEMA_SQL, ("testdb_mock", table_name))
     expected_result = [
         {"column_name": "id", "data_type": "int(11)"},
         {"column_name": "name", "data_type": "varchar(255)"}
     ]
     assert result == expected_result
 
+@pytest.mark.asyncio
+async def test_get_table_schema_memoized_until_invalidated(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = [("id", "int(11)")]
+
+    await main_module.get_table_schema(mock_ctx, "my_table")
+    await main_module.get_table_schema(mock_ctx, "my_table")
+    assert mock_cur.execute.call_count == 1
+
+    result = await main_module.invalidate_schema_cache(mock_ctx, "my_table")
+    assert result == {"invalidated": 1}
+
+    mock_cur.fetchall.return_value = [("id", "bigint(20)")]
+    schema = await main_module.get_table_schema(mock_ctx, "my_table")
+    assert mock_cur.execute.call_count == 2
+    assert schema == [{"column_name": "id", "data_type": "bigint(20)"}]
+
+@pytest.mark.asyncio
+async def test_invalidate_schema_cache_all_tables(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = [("id", "int(11)")]
+    await main_module.get_table_schema(mock_ctx, "table_a")
+    await main_module.get_table_schema(mock_ctx, "table_b")
+
+    result = await main_module.invalidate_schema_cache(mock_ctx)
+
+    assert result == {"invalidated": 2}
+    assert len(main_module._schema_cache) == 0
+
+@pytest.mark.asyncio
+async def test_get_table_schema_table_not_found(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = []
+
+    result = await main_module.get_table_schema(mock_ctx, "missing_table")
+
+    assert result == {"error": "Table not found"}
+
+@pytest.mark.asyncio
+async def test_get_table_schema_missing_table_not_cached(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = []
+    assert await main_module.get_table_schema(mock_ctx, "not_created_yet") == {"error": "Table not found"}
+
+    # The table is created later and must be visible without invalidating the cache
+    mock_cur.fetchall.return_value = [("id", "int(11)")]
+    result = await main_module.get_table_schema(mock_ctx, "not_created_yet")
+
+    assert result == [{"column_name": "id", "data_type": "int(11)"}]
+
+@pytest.mark.asyncio
+async def test_execute_query_invalidates_schema_cache(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = [("id", "int(11)")]
+    await main_module.get_table_schema(mock_ctx, "my_table")
+
+    await main_module.execute_query(mock_ctx, "ALTER TABLE my_table MODIFY id BIGINT")
+    mock_cur.fetchall.return_value = [("id", "bigint(20)")]
+    result = await main_module.get_table_schema(mock_ctx, "my_table")
+
+    assert result == [{"column_name": "id", "data_type": "bigint(20)"}]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("table_name", ["2fa_tokens", "price$history"])
+async def test_get_table_schema_accepts_unquoted_identifiers(mock_ctx, mock_db_objects, table_name):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = [("id", "int(11)")]
+
+    result = await main_module.get_table_schema(mock_ctx, table_name)
+
+    mock_cur.execute.assert_called_once_with(main_module._TABLE_SCHEMA_SQL, (main_module.DATABASE_NAME, table_name))
+    assert result == [{"column_name": "id", "data_type": "int(11)"}]
+
+@pytest.mark.asyncio
+async def test_get_table_schema_rejects_all_digit_name(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+
+    result = await main_module.get_table_schema(mock_ctx, "12345")
+
+    mock_cur.execute.assert_not_called()
+    assert result == {"error": "Invalid table name"}
+
+@pytest.mark.asyncio
+async def test_get_table_schema_long_name_not_memoized(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    cached_names = main_module._matches_identifier.cache_info().currsize
+
+    result = await main_module.get_table_schema(mock_ctx, "a" * 65)
+
+    mock_cur.execute.assert_not_called()
+    assert result == {"error": "Invalid table name"}
+    assert main_module._matches_identifier.cache_info().currsize == cached_names
+
+@pytest.mark.asyncio
+async def test_get_table_schema_rejects_trailing_newline(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+
+    result = await main_module.get_table_schema(mock_ctx, "users\n")
+
+    mock_cur.execute.assert_not_called()
+    assert result == {"error": "Invalid table name"}
+
+@pytest.mark.asyncio
+async def test_get_table_schema_invalid_table_name(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+
+    result = await main_module.get_table_schema(mock_ctx, "users; DROP TABLE users")
+
+    mock_cur.execute.assert_not_called()
+    assert result == {"error": "Invalid table name"}
+
+# Tests for describe_database
+@pytest.mark.asyncio
+async def test_describe_database_groups_columns_by_table(mock_ctx, mock_db_objects, mocker):
+    _, _, mock_cur = mock_db_objects
+    mocker.patch.object(main_module, 'DATABASE_NAME', 'testdb_mock')
+    mock_cur.fetchall.return_value = [
+        ("coupons", "id", "int(11)"),
+        ("coupons", "batch_id", "varchar(36)"),
+        ("users", "id", "bigint(20)")
+    ]
+
+    result = await main_module.describe_database(mock_ctx)
+
+    mock_cur.execute.assert_called_once_with(main_module._DATABASE_SCHEMA_SQL, ("testdb_mock",))
+    assert result == {
+        "coupons": [
+            {"column_name": "id", "data_type": "int(11)"},
+            {"column_name": "batch_id", "data_type": "varchar(36)"}
+        ],
+        "users": [{"column_name": "id", "data_type": "bigint(20)"}]
+    }
+
 # Tests for get_table_data
 @pytest.mark.asyncio
 async def test_get_table_data_success_select(mock_ctx, mock_db_objects):
-    _, _, mock_cur = mock_db_objects
+    _, mock_conn, mock_cur = mock_db_objects
     mock_data = [{"id": 1, "value": "data1"}, {"id": 2, "value": "data2"}]
-    mock_cur.fetchall.return_value = mock_data
+    mock_cur.fetchmany.side_effect = [mock_data, []]
     query = "SELECT * FROM test_table"
     
     result = await main_module.get_table_data(mock_ctx, query)
     
+    mock_conn.cursor.assert_called_once_with(main_module.aiomysql.SSDictCursor)
     mock_cur.execute.assert_called_once_with(query)
     assert result == mock_data
 
@@ -144,7 +384,7 @@ async def test_get_table_data_non_select_query(mock_ctx):
 @pytest.mark.asyncio
 async def test_get_table_data_select_empty(mock_ctx, mock_db_objects):
     _, _, mock_cur = mock_db_objects
-    mock_cur.fetchall.return_value = []
+    mock_cur.fetchmany.return_value = []
     query = "SELECT * FROM empty_table"
 
     result = await main_module.get_table_data(mock_ctx, query)
@@ -152,34 +392,191 @@ async def test_get_table_data_select_empty(mock_ctx, mock_db_objects):
     assert result == []
 
 
+@pytest.mark.asyncio
+async def test_get_table_data_select_leading_whitespace_lowercase(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchmany.side_effect = [[{"id": 1}], []]
+    query = "\n  select id FROM test_table"
+
+    result = await main_module.get_table_data(mock_ctx, query)
+
+    mock_cur.execute.assert_called_once_with(query)
+    assert result == [{"id": 1}]
+
+@pytest.mark.asyncio
+async def test_get_table_data_streams_batches_up_to_limit(mock_ctx, mock_db_objects):
+    _, mock_conn, mock_cur = mock_db_objects
+    mock_cur.fetchmany.side_effect = [
+        [{"id": 1}, {"id": 2}],
+        [{"id": 3}],
+    ]
+    mock_cur.fetchone.return_value = None # No rows left after the limit
+
+    result = await main_module.get_table_data(mock_ctx, "SELECT id FROM t", limit=3, batch_size=2)
+
+    assert [call.args[0] for call in mock_cur.fetchmany.call_args_list] == [2, 1]
+    assert result == [{"id": 1}, {"id": 2}, {"id": 3}]
+    # The result set was fully read, so the connection goes back to the pool
+    mock_cur.close.assert_awaited_once()
+    mock_conn.close.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_table_data_truncated_drops_connection(mock_ctx, mock_db_objects):
+    _, mock_conn, mock_cur = mock_db_objects
+    mock_cur.fetchmany.side_effect = [[{"id": 1}, {"id": 2}]]
+    mock_cur.fetchone.return_value = {"id": 3} # More rows are still pending on the server
+
+    result = await main_module.get_table_data(mock_ctx, "SELECT id FROM t", limit=2)
+
+    assert result == {
+        "rows": [{"id": 1}, {"id": 2}],
+        "truncated": True,
+        "message": "Result truncated to the first 2 rows",
+    }
+    # Closing the cursor would drain the remaining rows, so the connection is dropped instead
+    mock_conn.close.assert_called_once()
+    mock_cur.close.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_table_data_rejects_multiple_statements(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+
+    result = await main_module.get_table_data(mock_ctx, "SELECT 1; DROP TABLE t")
+
+    mock_cur.execute.assert_not_called()
+    assert result == {"error": "You can only perform SELECT queries"}
+
+@pytest.mark.asyncio
+async def test_get_table_data_allows_trailing_semicolon(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchmany.side_effect = [[{"id": 1}], []]
+
+    result = await main_module.get_table_data(mock_ctx, "SELECT id FROM t; ;\n")
+
+    assert result == [{"id": 1}]
+
+@pytest.mark.asyncio
+async def test_get_table_data_select_prefix_is_not_select(mock_ctx):
+    result = await main_module.get_table_data(mock_ctx, "SELECTED_ROWS()")
+
+    assert result == {"error": "You can only perform SELECT queries"}
+
+
+# Tests for batch
+@pytest.mark.asyncio
+async def test_batch_runs_queries_concurrently(mock_ctx, mocker):
+    queries = ["SELECT 1", "select 2"]
+    started = 0
+    all_started = asyncio.Event()
+
+    async def fake_fetch_rows(db, query):
+        # Each query waits until every query has started, so running them one
+        # after another never finishes
+        nonlocal started
+        started += 1
+        if started == len(queries):
+            all_started.set()
+        await all_started.wait()
+        return [{"query": query}], False
+
+    mock_fetch_rows = mocker.patch.object(main_module, '_fetch_rows', side_effect=fake_fetch_rows)
+
+    result = await asyncio.wait_for(main_module.batch(mock_ctx, queries), timeout=1)
+
+    assert mock_fetch_rows.call_count == 2
+    assert result == [[{"query": "SELECT 1"}], [{"query": "select 2"}]]
+
+@pytest.mark.asyncio
+async def test_batch_reports_failing_query_per_entry(mock_ctx, mocker):
+    async def fake_fetch_rows(db, query):
+        if "missing" in query:
+            raise Exception("Table 'db.missing' doesn't exist")
+        return [{"query": query}], False
+
+    mocker.patch.object(main_module, '_fetch_rows', side_effect=fake_fetch_rows)
+
+    result = await main_module.batch(mock_ctx, ["SELECT 1", "SELECT * FROM missing"])
+
+    assert result == [
+        [{"query": "SELECT 1"}],
+        {"error": "Table 'db.missing' doesn't exist"}
+    ]
+
+@pytest.mark.asyncio
+async def test_batch_rejects_too_many_queries(mock_ctx, mocker):
+    mock_fetch_rows = mocker.patch.object(main_module, '_fetch_rows')
+    queries = ["SELECT 1"] * (main_module.MAX_BATCH_QUERIES + 1)
+
+    result = await main_module.batch(mock_ctx, queries)
+
+    mock_fetch_rows.assert_not_called()
+    assert result == {"error": f"A batch can run at most {main_module.MAX_BATCH_QUERIES} queries"}
+
+@pytest.mark.asyncio
+async def test_batch_rejects_non_select(mock_ctx, mocker):
+    mock_fetch_rows = mocker.patch.object(main_module, '_fetch_rows')
+
+    result = await main_module.batch(mock_ctx, ["SELECT 1", "DELETE FROM coupons"])
+
+    mock_fetch_rows.assert_not_called()
+    assert result == {"error": "You can only perform SELECT queries (query 1)"}
+
+
 # Tests for show_indexes_table
 @pytest.mark.asyncio
-async def test_show_indexes_table_success(mock_ctx, mock_db_objects):
+async def test_show_indexes_table_success(mock_ctx, mock_db_objects, mocker):
     _, _, mock_cur = mock_db_objects
-    # Simulate output from aiomysql.DictCursor for SHOW INDEX
+    mocker.patch.object(main_module, 'DATABASE_NAME', 'testdb_mock')
+    # Simulate (INDEX_NAME, COLUMN_NAME) rows from the STATISTICS query: PRIMARY first, then by index name
     mock_cur.fetchall.return_value = [
-        {"Table": "coupons", "Non_unique": 0, "Key_name": "PRIMARY", "Seq_in_index": 1, "Column_name": "id", "Collation": "A"},
-        {"Table": "coupons", "Non_unique": 1, "Key_name": "batch_id_index", "Seq_in_index": 1, "Column_name": "batch_id", "Collation": "A"},
-        {"Table": "coupons", "Non_unique": 0, "Key_name": "payment_id_installment", "Seq_in_index": 1, "Column_name": "payment_id", "Collation": "A"},
-        {"Table": "coupons", "Non_unique": 0, "Key_name": "payment_id_installment", "Seq_in_index": 2, "Column_name": "current_installment", "Collation": "A"}
+        ("PRIMARY", "id"),
+        ("batch_id_index", "batch_id"),
+        ("payment_id_installment", "payment_id"),
+        ("payment_id_installment", "current_installment")
     ]
     table_name = "coupons"
     
     result = await main_module.show_indexes_table(mock_ctx, table_name)
     
-    mock_cur.execute.assert_called_once_with(f"SHOW INDEX FROM {table_name}")
+    mock_cur.execute.assert_called_once_with(main_module._TABLE_INDEXES_SQL, ("testdb_mock", table_name))
     expected_result = [
         {"index_name": "PRIMARY", "columns": ["id"]},
         {"index_name": "batch_id_index", "columns": ["batch_id"]},
         {"index_name": "payment_id_installment", "columns": ["payment_id", "current_installment"]}
     ]
     
-    # Check that all expected items are present in the result, allowing for different order
-    assert len(result) == len(expected_result)
-    for res_item in result:
-        assert any(exp_item['index_name'] == res_item['index_name'] and 
-                   sorted(exp_item['columns']) == sorted(res_item['columns']) 
-                   for exp_item in expected_result)
+    # Indexes keep the order MySQL returned them in, columns keep Seq_in_index order
+    assert result == expected_result
+
+@pytest.mark.asyncio
+async def test_show_indexes_table_without_indexes(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = []
+    mock_cur.fetchone.return_value = (1,) # The table exists
+
+    result = await main_module.show_indexes_table(mock_ctx, "no_index_table")
+
+    assert result == []
+
+@pytest.mark.asyncio
+async def test_show_indexes_table_table_not_found(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+    mock_cur.fetchall.return_value = []
+    mock_cur.fetchone.return_value = None
+
+    result = await main_module.show_indexes_table(mock_ctx, "missing_table")
+
+    mock_cur.execute.assert_called_with(main_module._TABLE_EXISTS_SQL, (main_module.DATABASE_NAME, "missing_table"))
+    assert result == {"error": "Table not found"}
+
+@pytest.mark.asyncio
+async def test_show_indexes_table_invalid_table_name(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+
+    result = await main_module.show_indexes_table(mock_ctx, "coupons`")
+
+    mock_cur.execute.assert_not_called()
+    assert result == {"error": "Invalid table name"}
 
 
 # Tests for get_db_pool
@@ -194,6 +591,10 @@ async def test_get_db_pool_success(monkeypatch, mocker):
     mocker.patch.object(main_module, 'DATABASE_PASSWORD', 'testpass_mock')
     mocker.patch.object(main_module, 'DATABASE_NAME', 'testdb_mock')
     mocker.patch.object(main_module, 'DATABASE_PORT', 3307) # Use a different port for mock
+    mocker.patch.object(main_module, 'POOL_MIN_SIZE', 4)
+    mocker.patch.object(main_module, 'POOL_MAX_SIZE', 8)
+    mocker.patch.object(main_module, 'POOL_RECYCLE', 1800)
+    mocker.patch.object(main_module, 'CONNECT_TIMEOUT', 5)
 
     # Mock aiomysql.create_pool
     mock_create_pool = mocker.patch('aiomysql.create_pool', new_callable=AsyncMock)
@@ -209,11 +610,27 @@ async def test_get_db_pool_success(monkeypatch, mocker):
         db="testdb_mock",
         port=3307,
         autocommit=False, # As per main.py
+        minsize=4,
+        maxsize=8,
+        pool_recycle=1800,
+        connect_timeout=5,
         # loop=mocker.ANY # aiomysql.create_pool uses asyncio.get_event_loop() by default if None
     )
     assert pool == mock_pool_instance
     assert main_module.db_pool == mock_pool_instance # Check global var assignment
 
+def test_pool_sizes_only_max_set(monkeypatch):
+    monkeypatch.delenv("MYSQL_POOL_MIN", raising=False)
+    monkeypatch.setenv("MYSQL_POOL_MAX", "1")
+
+    assert main_module._pool_sizes_from_env() == (1, 1)
+
+def test_pool_sizes_min_above_max_is_clamped(monkeypatch):
+    monkeypatch.setenv("MYSQL_POOL_MIN", "16")
+    monkeypatch.setenv("MYSQL_POOL_MAX", "10")
+
+    assert main_module._pool_sizes_from_env() == (10, 10)
+
 @pytest.mark.asyncio
 async def test_get_db_pool_missing_env_var(monkeypatch, mocker):
     # Ensure db_pool is None at the start of the test
@@ -255,6 +672,24 @@ async def test_get_db_pool_already_initialized(mocker):
     # Ensure it's reset for subsequent tests that might rely on it being None initially
     mocker.patch.object(main_module, 'db_pool', None)
 
+@pytest.mark.asyncio
+async def test_get_db_pool_concurrent_calls_create_one_pool(mocker):
+    main_module.db_pool = None
+    mock_pool_instance = AsyncMock()
+
+    async def slow_create_pool(**kwargs):
+        # Yield to the event loop so the other callers race on initialization
+        await asyncio.sleep(0)
+        return mock_pool_instance
+
+    mock_create_pool = mocker.patch('aiomysql.create_pool', side_effect=slow_create_pool)
+
+    pools = await asyncio.gather(*(main_module.get_db_pool() for _ in range(5)))
+
+    mock_create_pool.assert_called_once()
+    assert all(pool is mock_pool_instance for pool in pools)
+    main_module.db_pool = None
+
 # Tests for app_lifespan
 @pytest.mark.asyncio
 async def test_app_lifespan(mocker):
@@ -300,16 +735,18 @@ async def test_app_lifespan(mocker):
 # Tests for show_explain_query
 @pytest.mark.asyncio
 async def test_show_explain_query_success_select(mock_ctx, mock_db_objects):
-    _, _, mock_cur = mock_db_objects
-    # Simulate output from aiomysql.DictCursor for EXPLAIN
+    _, mock_conn, mock_cur = mock_db_objects
     mock_explain_output = [
         {"id": 1, "select_type": "SIMPLE", "table": "coupons", "type": "ref", "possible_keys": "batch_id_index", "key": "batch_id_index", "key_len": "147", "ref": "const", "rows": 1, "Extra": "Using index"}
     ]
-    mock_cur.fetchall.return_value = mock_explain_output
+    # Simulate tuple rows plus cursor.description for EXPLAIN
+    mock_cur.description = [(name,) + (None,) * 6 for name in mock_explain_output[0]]
+    mock_cur.fetchall.return_value = [tuple(row.values()) for row in mock_explain_output]
     query = "SELECT * FROM coupons WHERE batch_id = 'test'"
     
     result = await main_module.show_explain_query(mock_ctx, query)
     
+    mock_conn.cursor.assert_called_once_with()
     mock_cur.execute.assert_called_once_with(f"EXPLAIN {query}")
     assert result == mock_explain_output
 
@@ -321,9 +758,19 @@ async def test_show_explain_query_non_select(mock_ctx):
     
     assert result == {"error": "You can only perform SELECT queries. Start with SELECT."}
 
+@pytest.mark.asyncio
+async def test_show_explain_query_rejects_multiple_statements(mock_ctx, mock_db_objects):
+    _, _, mock_cur = mock_db_objects
+
+    result = await main_module.show_explain_query(mock_ctx, "SELECT 1; DELETE FROM coupons")
+
+    mock_cur.execute.assert_not_called()
+    assert result == {"error": "You can only perform SELECT queries. Start with SELECT."}
+
 @pytest.mark.asyncio
 async def test_show_explain_query_select_empty_result(mock_ctx, mock_db_objects):
     _, _, mock_cur = mock_db_objects
+    mock_cur.description = [("id",) + (None,) * 6]
     mock_cur.fetchall.return_value = [] # EXPLAIN returned empty (unusual, but testable)
     query = "SELECT * FROM very_empty_table_or_view"
 